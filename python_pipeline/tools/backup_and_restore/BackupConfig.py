@@ -28,6 +28,7 @@
 # DEPENDENCIES:
 #   - jnpr-pyez: The official Juniper library for automating Junos devices.
 #   - lxml: Used by jnpr-pyez for XML parsing and manipulation.
+#   - orjson (optional): Faster JSON encoding; falls back to the standard `json` module.
 #
 # HOW-TO GUIDE (INTEGRATION):
 #   This class is not intended to be run as a standalone script. It should be imported
@@ -39,6 +40,9 @@
 #      `status, data = await manager.run_backup()`
 #   3. The `status` will be "SUCCESS" or "FAILED", and `data` will contain the results
 #      or error details.
+#   4. For several devices, use the module-level driver instead, which bounds how many
+#      sessions are open at once:
+#      `results = await backup_many(hosts, user, password, path, callback_func)`
 #
 # =========================================================================================
 
@@ -47,13 +51,75 @@
 # SECTION 1: IMPORTS & DEPENDENCIES
 # All necessary standard library and third-party modules are imported here.
 # ====================================================================================
+import os
 import json
 import asyncio
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from lxml import etree
 from jnpr.junos import Device
 
+# orjson keeps its C encoder on the fast path even when indenting, unlike the
+# standard library. It is optional; the stdlib `json` module is used without it.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Without orjson, the stdlib encoder streams its output through a large write buffer
+# instead of materializing the whole document as one string first.
+_JSON_WRITE_BUFFER_SIZE = 1 << 20
+# Built once and shared by every backup; JSONEncoder keeps no per-call state.
+_JSON_ENCODER = json.JSONEncoder(default=str)
+# Two-space indent, matching orjson's OPT_INDENT_2, so --pretty_print output is identical either way.
+_JSON_PRETTY_ENCODER = json.JSONEncoder(default=str, indent=2)
+
+
+def _replace_atomic(path: Path, write, mode: str = "wb", **open_kwargs) -> None:
+    """
+    Calls `write` with a file object for a uniquely named temporary sibling of `path`,
+    then renames the temporary file over `path`.
+
+    `os.replace` is atomic on POSIX, so readers (such as `RestoreManager` or the backup
+    listing in the backend) never observe a partially written backup file. The temporary
+    file is removed if anything fails before the rename.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            # mkstemp creates the file owner-only; backups stay readable like any other file.
+            os.fchmod(f.fileno(), 0o644)
+            write(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Atomically writes `data` to `path`."""
+    _replace_atomic(path, lambda f: f.write(data))
+
+
+def _dump_json(obj, path: Path, pretty: bool = False) -> None:
+    """
+    Serializes `obj` to JSON and atomically writes it to `path`.
+
+    Uses orjson when it is installed and the standard `json` module otherwise. Values
+    that neither encoder understands natively are converted with `str()`.
+    """
+    if orjson is not None:
+        _write_bytes_atomic(path, orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)))
+        return
+    encoder = _JSON_PRETTY_ENCODER if pretty else _JSON_ENCODER
+    _replace_atomic(path, lambda f: f.writelines(encoder.iterencode(obj)),
+                    mode="w", encoding="utf-8", buffering=_JSON_WRITE_BUFFER_SIZE)
+
 
 # ====================================================================================
 # SECTION 2: BACKUP MANAGER CLASS
@@ -62,7 +128,7 @@ from jnpr.junos import Device
 class BackupManager:
     """Manages the backup process for a single Juniper device."""
 
-    def __init__(self, host, username, password, backup_path: Path, step_offset: int, progress_callback: callable):
+    def __init__(self, host, username, password, backup_path: Path, step_offset: int, progress_callback: callable, pretty: bool = False):
         """
         Initializes the manager for a specific device.
 
@@ -75,6 +141,8 @@ class BackupManager:
                                used for calculating UI progress in multi-device runs.
             progress_callback (callable): The function to call to send progress updates back
                                           to the orchestrator.
+            pretty (bool): Indent the XML and JSON backups for human review. Off by default,
+                           since the machine-readable copies do not need the whitespace.
         """
         self.host = host
         self.username = username
@@ -82,57 +150,68 @@ class BackupManager:
         self.backup_path = backup_path
         self.step_offset = step_offset
         self.progress_callback = progress_callback
+        self.pretty = pretty
         self.dev = None # The PyEZ Device object, initialized later.
 
-    def _save_config_files(self) -> dict:
+    def _save_config_files(self, hostname: str, timestamp: str) -> dict:
         """
         (Private Helper) Retrieves configuration in multiple formats and saves them to files.
 
         This is a synchronous method intended to be run in a separate thread via `asyncio.to_thread`
         to avoid blocking the main event loop.
 
+        Args:
+            hostname (str): The device hostname used for the directory and file names.
+            timestamp (str): The run timestamp (`%Y%m%d_%H%M%S`) shared by every file of this backup.
+
         Returns:
             A dictionary mapping the config format (e.g., "xml") to the full path
             of the created file.
         """
-        # Use the device's actual hostname for the directory name, falling back to the IP.
-        hostname = self.dev.facts.get("hostname", self.host)
         device_backup_path = self.backup_path / hostname
         device_backup_path.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # All four files share this prefix; only the format extension differs.
+        file_prefix = f"{timestamp}_{hostname}_config"
         files_created = {}
+        # Text formats are encoded to UTF-8 up front and written as bytes, which skips the text
+        # I/O layer and does not depend on the container's locale encoding.
+        # Each RPC reply and its serialized form are released as soon as the file is written,
+        # so only one copy of the configuration is held in memory at a time rather than all four.
 
         # --- XML Format ---
         # The default and most reliable format for programmatic use.
         config_xml = self.dev.rpc.get_config()
         # FIX: Check for `is not None` to avoid FutureWarning and handle empty responses gracefully.
-        xml_content = etree.tostring(config_xml, pretty_print=True) if config_xml is not None else b""
-        xml_filepath = device_backup_path / f"{timestamp}_{hostname}_config.xml"
-        xml_filepath.write_bytes(xml_content)
+        xml_content = etree.tostring(config_xml, pretty_print=self.pretty) if config_xml is not None else b""
+        xml_filepath = device_backup_path / f"{file_prefix}.xml"
+        _write_bytes_atomic(xml_filepath, xml_content)
         files_created["xml"] = str(xml_filepath)
+        del config_xml, xml_content
 
         # --- Set Format ---
         # Useful for human review and manual application.
         config_set = self.dev.rpc.get_config(options={"format": "set"})
         set_content = config_set.text if config_set is not None and hasattr(config_set, 'text') else ""
-        set_filepath = device_backup_path / f"{timestamp}_{hostname}_config.set"
-        set_filepath.write_text(set_content)
+        set_filepath = device_backup_path / f"{file_prefix}.set"
+        _write_bytes_atomic(set_filepath, set_content.encode("utf-8", errors="surrogatepass"))
         files_created["set"] = str(set_filepath)
+        del config_set, set_content
 
         # --- JSON Format ---
         # Ideal for modern automation and API integration.
         config_json = self.dev.rpc.get_config(options={"format": "json"})
-        json_filepath = device_backup_path / f"{timestamp}_{hostname}_config.json"
+        json_filepath = device_backup_path / f"{file_prefix}.json"
         # Use `or {}` as a fallback for empty JSON responses.
-        json_filepath.write_text(json.dumps(config_json or {}, indent=4))
+        _dump_json(config_json or {}, json_filepath, pretty=self.pretty)
         files_created["json"] = str(json_filepath)
+        del config_json
 
         # --- Text/Conf Format ---
         # The standard, human-readable curly-brace format.
         config_text = self.dev.rpc.get_config(options={'format': 'text'})
         text_content = config_text.text if config_text is not None and hasattr(config_text, 'text') else ""
-        text_filepath = device_backup_path / f"{timestamp}_{hostname}_config.conf"
-        text_filepath.write_text(text_content)
+        text_filepath = device_backup_path / f"{file_prefix}.conf"
+        _write_bytes_atomic(text_filepath, text_content.encode("utf-8", errors="surrogatepass"))
         files_created["text"] = str(text_filepath)
 
         return files_created
@@ -153,18 +232,21 @@ class BackupManager:
             # --- Step 1: Connect to Device ---
             self.progress_callback("info", "STEP_START", {"step": connect_step}, f"Connecting to {self.host}...")
 
-            # Create the PyEZ Device object. `gather_facts=True` is important to get the hostname.
-            self.dev = Device(host=self.host, user=self.username, password=self.password, gather_facts=True, normalize=True)
+            # Only the hostname fact is needed. Skipping the eager facts gather at open() and reading
+            # it lazily costs just the RPC(s) behind that one fact; the lookup runs off the loop.
+            self.dev = Device(host=self.host, user=self.username, password=self.password, gather_facts=False, normalize=True)
             # Run the blocking `open()` call in a separate thread.
             await asyncio.to_thread(self.dev.open)
-            hostname = self.dev.facts.get("hostname", self.host)
+            hostname = await asyncio.to_thread(self.dev.facts.get, "hostname", self.host)
             self.progress_callback("success", "STEP_COMPLETE", {"step": connect_step, "status": "COMPLETED"}, f"Successfully connected to {hostname}")
 
             # --- Step 2: Perform Backup ---
             self.progress_callback("info", "STEP_START", {"step": backup_step}, f"Starting backup for {hostname}...")
 
+            # Capture the timestamp once so every file of this backup shares the same name prefix.
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             # Run the synchronous file-saving logic in a thread to avoid blocking the event loop.
-            files = await asyncio.to_thread(self._save_config_files)
+            files = await asyncio.to_thread(self._save_config_files, hostname, timestamp)
             self.progress_callback("success", "STEP_COMPLETE", {"step": backup_step, "status": "COMPLETED"}, f"Backup for {hostname} successful")
 
             # Return a success status and detailed results.
@@ -183,3 +265,42 @@ class BackupManager:
             # Always ensure the device connection is closed to prevent orphaned sessions.
             if self.dev and self.dev.connected:
                 self.dev.close()
+
+
+# ====================================================================================
+# SECTION 3: MULTI-DEVICE DRIVER
+# Runs one `BackupManager` per host with a bounded number of concurrent sessions.
+# ====================================================================================
+async def backup_many(hosts, username, password, backup_path: Path, progress_callback: callable, max_parallel: int = 10, pretty: bool = False) -> list:
+    """
+    Backs up several devices concurrently, never holding more than `max_parallel`
+    NETCONF sessions open at the same time.
+
+    Args:
+        hosts (list): The IP addresses or hostnames of the devices.
+        username (str): The SSH username for authentication.
+        password (str): The SSH password for authentication.
+        backup_path (Path): The base Path object for the backup directory.
+        progress_callback (callable): The function to call to send progress updates.
+        max_parallel (int): The maximum number of backups running at once.
+        pretty (bool): Indent the XML and JSON backups for human review.
+
+    Returns:
+        A list of ("STATUS", data_dictionary) tuples, in the same order as `hosts`.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def _bounded(manager: BackupManager) -> tuple:
+        async with semaphore:
+            return await manager.run_backup()
+
+    # Each host is allotted two progress steps (Connect + Backup).
+    managers = [
+        BackupManager(host, username, password, backup_path, i * 2, progress_callback, pretty)
+        for i, host in enumerate(hosts)
+    ]
+    # The interactive UI flow targets one device at a time; await it directly rather than
+    # wrapping it in a semaphore and a gathered task.
+    if len(managers) == 1:
+        return [await managers[0].run_backup()]
+    return await asyncio.gather(*(_bounded(m) for m in managers))
@@ -15,6 +15,8 @@
 #     the most reliable format for programmatic configuration management.
 #   - Graceful "No Changes" Handling: Intelligently detects when a restore operation
 #     results in no changes and sends a specific completion event for the UI.
+#   - Identical-Config Short-Circuit: When the running configuration hashes the same as
+#     the text backup, the lock/load/diff round trips are skipped entirely.
 #   - Decoupled Progress Reporting: Uses a callback function to send detailed progress
 #     updates, making it highly reusable.
 #
@@ -23,7 +25,11 @@
 # =================================================================================================
 # SECTION 1: IMPORTS
 # =================================================================================================
+import os
+import re
+import mmap
 import asyncio
+import hashlib
 
 # --- ### THE FIX IS HERE ### ---
 # The PyEZ imports must be wrapped in a `try...except` block to handle cases
@@ -38,7 +44,38 @@ except ImportError as e:
 
 
 # =================================================================================================
-# SECTION 2: RESTORE MANAGER CLASS
+# SECTION 2: HELPERS
+# =================================================================================================
+# Junos prefixes text configuration with a `## Last changed: <timestamp>` comment that moves on
+# every commit. With normalize=True the whole configuration is one line, so only the comment
+# itself is matched, not the rest of its line.
+_LAST_CHANGED_RE = re.compile(rb'\s*## Last changed: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} \w+\s*')
+
+
+def _config_digest(data) -> bytes:
+    """Returns the BLAKE2b digest of text configuration `data`, ignoring the `## Last changed:` header."""
+    header = _LAST_CHANGED_RE.match(data)
+    with memoryview(data)[header.end() if header else 0:] as body:
+        return hashlib.blake2b(body).digest()
+
+
+def _hash_file(path) -> bytes:
+    """
+    Returns the `_config_digest` of a text configuration backup.
+
+    The file is memory-mapped read-only, and the header match and the hash both run on the
+    mapping, so the page cache is hashed directly rather than copied into a Python bytes object.
+    """
+    with open(path, 'rb') as f:
+        # An empty file cannot be mapped; its digest is simply that of no input.
+        if not os.fstat(f.fileno()).st_size:
+            return _config_digest(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return _config_digest(m)
+
+
+# =================================================================================================
+# SECTION 3: RESTORE MANAGER CLASS
 # Encapsulates all logic for the restore operation on a single device.
 # =================================================================================================
 class RestoreManager:
@@ -70,9 +107,11 @@ class RestoreManager:
             # STEP 1: Connect to Device
             # -------------------------------------------------------------------------------------
             self.progress_callback("info", "STEP_START", {"step": connect_step}, f"Connecting to {self.host} for restore...")
-            self.dev = Device(host=self.host, user=self.username, password=self.password, gather_facts=True, normalize=True)
+            # Only the hostname fact is needed. Skipping the eager facts gather at open() and reading
+            # it lazily costs just the RPC(s) behind that one fact; the lookup runs off the loop.
+            self.dev = Device(host=self.host, user=self.username, password=self.password, gather_facts=False, normalize=True)
             await asyncio.to_thread(self.dev.open)
-            hostname = self.dev.facts.get("hostname", self.host)
+            hostname = await asyncio.to_thread(self.dev.facts.get, "hostname", self.host)
             self.progress_callback("success", "STEP_COMPLETE", {"step": connect_step, "status": "COMPLETED"}, f"Successfully connected to {hostname}")
 
             # -------------------------------------------------------------------------------------
@@ -80,14 +119,38 @@ class RestoreManager:
             # -------------------------------------------------------------------------------------
             self.progress_callback("info", "STEP_START", {"step": validate_step}, "Locating and validating backup file...")
             device_backup_dir = self.backup_path / hostname
-            base_backup_name = self.backup_file.split('_config.')[0]
+            base_backup_name, _, _ = self.backup_file.rpartition('_config.')
+            if not base_backup_name:
+                raise ValueError(f"Backup file name '{self.backup_file}' does not follow the '<timestamp>_<hostname>_config.<format>' pattern.")
             xml_backup_filename = f"{base_backup_name}_config.xml"
             xml_backup_path = device_backup_dir / xml_backup_filename
 
-            if not await asyncio.to_thread(xml_backup_path.is_file):
+            # A single stat() is far cheaper than a thread-pool hop, so check it inline.
+            if not xml_backup_path.is_file():
                 raise FileNotFoundError(f"The required XML backup file '{xml_backup_filename}' was not found at {device_backup_dir}.")
             self.progress_callback("success", "STEP_COMPLETE", {"step": validate_step, "status": "COMPLETED"}, f"Found reliable XML backup: {xml_backup_filename}")
 
+            # Pre-flight: if the running config matches the text backup taken alongside the XML one,
+            # apart from the `## Last changed:` header, there is nothing to restore. One get-config
+            # RPC and a hash replace the lock, load and diff round trips.
+            already_compliant = False
+            conf_backup_path = device_backup_dir / f"{base_backup_name}_config.conf"
+            if conf_backup_path.is_file():
+                try:
+                    running = await asyncio.to_thread(self.dev.rpc.get_config, options={'format': 'text'})
+                    running_text = running.text if running is not None and hasattr(running, 'text') else ""
+                    if running_text:
+                        running_digest = _config_digest(running_text.encode("utf-8", errors="surrogatepass"))
+                        already_compliant = running_digest == await asyncio.to_thread(_hash_file, conf_backup_path)
+                except Exception:
+                    # The shortcut is best-effort; any failure falls through to the lock/load/diff path.
+                    already_compliant = False
+            if already_compliant:
+                self.progress_callback("info", "STEP_START", {"step": load_step}, "Comparing running configuration with the backup...")
+                self.progress_callback("success", "STEP_COMPLETE", {"step": load_step, "status": "COMPLETED"}, "Running configuration matches the backup. No configuration changes detected.")
+                self.progress_callback("success", "STEP_COMPLETE", {"step": commit_step, "status": "COMPLETED"}, "Skipped: No changes to commit.")
+                return ("SUCCESS", {"host": self.host, "hostname": hostname, "message": "Device is already compliant. No configuration changes needed."})
+
             # Use a context manager for safe, automatic configuration locking and unlocking.
             with Config(self.dev, mode='private') as cu:
                 # ---------------------------------------------------------------------------------
@@ -23,7 +23,8 @@
 #     classes, passing them a callback for clean, decoupled progress reporting.
 #
 # DEPENDENCIES:
-#   - PyYAML: For parsing YAML inventory files.
+#   - PyYAML: For parsing YAML inventory files (imported only when an inventory is used).
+#   - orjson (optional): Faster encoding of progress events and the final result.
 #   - Local Modules: `BackupConfig.py` and `RestoreConfig.py`.
 #
 # =================================================================================================
@@ -34,30 +35,34 @@
 # =================================================================================================
 import argparse
 import json
+import os
 import sys
 import logging
-import traceback
-import yaml
 import asyncio
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-# Local worker classes that contain the device-specific logic.
-from BackupConfig import BackupManager
-from RestoreConfig import RestoreManager
+# orjson is an optional C-accelerated encoder; the stdlib encoder is used when it is absent.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The local worker modules (`BackupConfig`, `RestoreConfig`) are imported inside the command
+# branch that needs them, so each run only pays for the PyEZ/lxml imports of its own workflow.
 
 
 # =================================================================================================
 # SECTION 2: UTILITIES & CONFIGURATION
 # Helper functions for logging, progress reporting, and inventory parsing.
 # =================================================================================================
+logger = logging.getLogger(__name__)
 
 def setup_logging():
     """
-    Configures a logger for internal diagnostics, directing all output to stderr.
+    Configures the module logger for internal diagnostics, directing all output to stderr.
     This separates developer-facing logs from the UI-facing JSON on stdout.
     """
-    logger = logging.getLogger(__name__)
     if not logger.handlers:
         handler = logging.StreamHandler(sys.stderr)
         formatter = logging.Formatter('%(asctime)s - [ORCHESTRATOR] - %(levelname)s - %(message)s')
@@ -66,41 +71,102 @@ def setup_logging():
         logger.setLevel(logging.INFO)
     return logger
 
+# Progress events raised while the event loop is running are coalesced: they are held for up to
+# PROGRESS_BATCH_MS milliseconds (or until PROGRESS_BATCH_SIZE are pending) and then written to
+# stdout together. Setting PROGRESS_BATCH_MS=0 restores one write per event.
+PROGRESS_BATCH_SIZE = int(os.environ.get("PROGRESS_BATCH_SIZE", "64"))
+PROGRESS_BATCH_MS = int(os.environ.get("PROGRESS_BATCH_MS", "50"))
+_pending_progress = []
+_progress_flush_handle = None
+
+def _encode_json_line(obj: dict) -> bytes:
+    """Encodes `obj` compactly as one newline-terminated line of JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return json.dumps(obj, separators=(',', ':'), default=str).encode() + b"\n"
+
+def flush_progress():
+    """Writes every pending progress event to stdout in a single write."""
+    global _progress_flush_handle
+    if _progress_flush_handle is not None:
+        _progress_flush_handle.cancel()
+        _progress_flush_handle = None
+    if _pending_progress:
+        sys.stdout.buffer.write(b"".join(_pending_progress))
+        sys.stdout.buffer.flush()
+        _pending_progress.clear()
+
+def queue_json_line(obj: dict):
+    """Queues a progress event, scheduling a flush on the running event loop if needed."""
+    global _progress_flush_handle
+    _pending_progress.append(_encode_json_line(obj))
+    if len(_pending_progress) >= PROGRESS_BATCH_SIZE or PROGRESS_BATCH_MS <= 0:
+        flush_progress()
+        return
+    if _progress_flush_handle is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to schedule on (e.g. called before `asyncio.run`), so write immediately.
+            flush_progress()
+            return
+        _progress_flush_handle = loop.call_later(PROGRESS_BATCH_MS / 1000, flush_progress)
+
+def emit_json_line(obj: dict):
+    """Writes `obj` to stdout as a single, flushed line, after any pending progress events."""
+    flush_progress()
+    sys.stdout.buffer.write(_encode_json_line(obj))
+    sys.stdout.buffer.flush()
+
 def send_progress(level: str, event_type: str, data: dict, message: str = ""):
     """
     Constructs a structured JSON event and prints it to stdout.
     This is the single, unified channel for all real-time UI communication.
     """
+    # orjson serializes the datetime natively (identical to isoformat()), so the timestamp
+    # string is only formatted in Python when the stdlib encoder is in use.
+    now = datetime.now(timezone.utc)
     progress_update = {
         "level": level.upper(),
         "event_type": event_type,
         "message": message,
         "data": data,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": now if orjson is not None else now.isoformat()
     }
     # --- ### STANDARDIZATION FIX ### ---
     # By printing to `sys.stdout` and removing the "JSON_PROGRESS:" prefix, this script
     # now adheres to the same data contract as the File Uploader and JSNAPy runners.
-    # The `flush=True` is critical for real-time streaming.
-    print(json.dumps(progress_update), file=sys.stdout, flush=True)
+    # Each event is encoded compactly as one line and queued; events raised close together
+    # reach the backend in a single write, and the final result always flushes them first.
+    queue_json_line(progress_update)
 
 def parse_inventory_file(inventory_path: Path) -> list[str]:
     """
     Parses a YAML inventory file and returns a list of Juniper host IPs.
     This function is designed to understand a specific, structured YAML format.
     """
+    # Imported lazily: hostname-targeted runs never need the YAML parser.
+    import yaml
+    # Prefer the libyaml-backed loader; PyYAML only provides it when built against libyaml.
+    try:
+        from yaml import CSafeLoader as YamlSafeLoader
+    except ImportError:
+        from yaml import SafeLoader as YamlSafeLoader
     with open(inventory_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=YamlSafeLoader)
     if not isinstance(data, list):
         raise TypeError(f"Inventory file '{inventory_path.name}' is not a valid YAML list.")
-    # Extract IP addresses for all Juniper devices found in the inventory.
-    return [
-        d["ip_address"]
-        for loc in data
-        for dt in ["routers", "switches"]
-        for d in loc.get(dt, [])
-        if d.get("vendor", "").upper() == "JUNIPER" and d.get("ip_address")
-    ]
+    # Extract IP addresses for all Juniper devices found in the inventory in a single pass.
+    juniper_ips = []
+    for loc in data:
+        for dt in ("routers", "switches"):
+            for d in loc.get(dt) or ():
+                ip_address, vendor = d.get("ip_address"), d.get("vendor")
+                # The first-letter check rejects most non-Juniper entries before an upper-cased
+                # copy of the vendor string is allocated.
+                if ip_address and vendor and vendor[0] in "Jj" and vendor.upper() == "JUNIPER":
+                    juniper_ips.append(ip_address)
+    return juniper_ips
 
 
 # =================================================================================================
@@ -109,7 +175,7 @@ def parse_inventory_file(inventory_path: Path) -> list[str]:
 # =================================================================================================
 async def main():
     """Parses arguments and orchestrates the backup or restore workflow."""
-    logger = setup_logging()
+    setup_logging()
 
     # ---------------------------------------------------------------------------------------------
     # Subsection 3.1: Argument Parsing
@@ -121,20 +187,28 @@ async def main():
     parser.add_argument('--username', required=True, help="The username for device authentication.")
     parser.add_argument('--password', required=True, help="The password for device authentication.")
     parser.add_argument('--backup_path', default='/backups', help="The directory where backups are stored.")
+    parser.add_argument('--max_concurrency', type=int, default=10, help="Maximum number of devices backed up at the same time.")
+    parser.add_argument('--pretty_print', action='store_true', help="Write indented, human-readable XML and JSON backups.")
     parser.add_argument('--backup_file', help="The specific backup file to restore.")
     parser.add_argument('--type', default='override', choices=['override', 'merge', 'update'], help="The restore method.")
     parser.add_argument('--confirmed_commit_timeout', type=int, default=0, help="Timeout for confirmed commit rollback.")
     parser.add_argument('--commit_timeout', type=int, default=300, help="Timeout for the commit operation itself.")
 
-    final_results = {}
+    # The result object is created once, already holding every key, and filled in by
+    # whichever path finishes the run.
+    final_results = {"success": False, "message": "", "details": {}}
     is_overall_success = False
     try:
         args = parser.parse_args()
+        # Reject a bad value like any other CLI error, before the UI is told an operation started.
+        if args.max_concurrency < 1:
+            parser.error("--max_concurrency must be at least 1.")
 
         # ---------------------------------------------------------------------------------------------
         # Subsection 3.2: Backup Workflow
         # ---------------------------------------------------------------------------------------------
         if args.command == 'backup':
+            from BackupConfig import backup_many
             # Determine the list of target hosts from either the inventory or hostname argument.
             if args.inventory_file:
                 inventory_path = Path(args.inventory_file)
@@ -146,6 +220,9 @@ async def main():
             else:
                 raise ValueError("No target specified. Use --hostname or --inventory_file for backup.")
 
+            # A host listed more than once (e.g. as both router and switch in the inventory) is
+            # connected to only once; order is preserved for predictable step numbering.
+            hosts_to_run = list(dict.fromkeys(hosts_to_run))
             if not hosts_to_run:
                 raise ValueError("No target hosts found for backup.")
 
@@ -153,24 +230,22 @@ async def main():
             total_steps = len(hosts_to_run) * 2 # (Connect + Backup per host)
             send_progress("info", "OPERATION_START", {"total_steps": total_steps}, f"Starting backup for {len(hosts_to_run)} device(s)")
 
-            # Create an asynchronous task for each host.
-            tasks = [
-                BackupManager(h, args.username, args.password, Path(args.backup_path), i*2, send_progress).run_backup()
-                for i, h in enumerate(hosts_to_run)
-            ]
-            # Wait for all backup tasks to complete concurrently.
-            results = await asyncio.gather(*tasks)
+            # Back up all hosts concurrently, with a bounded number of open sessions.
+            results = await backup_many(hosts_to_run, args.username, args.password, Path(args.backup_path), send_progress, max_parallel=args.max_concurrency, pretty=args.pretty_print)
 
             # Collate the results from all tasks.
             succeeded = {data['host']: data for status, data in results if status == "SUCCESS"}
             failed = {data['host']: data['error'] for status, data in results if status == "FAILED"}
             is_overall_success = not failed
-            final_results = {"success": is_overall_success, "message": f"Backup finished. Succeeded: {len(succeeded)}, Failed: {len(failed)}.", "details": {"succeeded": succeeded, "failed": failed}}
+            final_results["success"] = is_overall_success
+            final_results["message"] = f"Backup finished. Succeeded: {len(succeeded)}, Failed: {len(failed)}."
+            final_results["details"] = {"succeeded": succeeded, "failed": failed}
 
         # ---------------------------------------------------------------------------------------------
         # Subsection 3.3: Restore Workflow
         # ---------------------------------------------------------------------------------------------
         elif args.command == 'restore':
+            from RestoreConfig import RestoreManager
             if not args.hostname: raise ValueError("A target --hostname is required for the restore command.")
             if not args.backup_file: raise ValueError("A --backup_file name is required for the restore command.")
             send_progress("info", "OPERATION_START", {"total_steps": 4}, f"Starting restore for {args.hostname}")
@@ -182,7 +257,9 @@ async def main():
             )
             status, data = await manager.run_restore()
             is_overall_success = status == "SUCCESS"
-            final_results = {"success": is_overall_success, "message": data.get("message", data.get("error")), "details": data}
+            final_results["success"] = is_overall_success
+            final_results["message"] = data.get("message", data.get("error"))
+            final_results["details"] = data
 
         # Announce the completion of the entire operation.
         send_progress("success" if is_overall_success else "error", "OPERATION_COMPLETE", {"status": "SUCCESS" if is_overall_success else "FAILED"}, "All operations finished.")
@@ -192,12 +269,16 @@ async def main():
         # Subsection 3.4: Global Error Handling
         # ---------------------------------------------------------------------------------------------
         error_msg = f"A critical error occurred in the orchestrator: {e}"
+        # The full traceback always goes to the stderr log; it is only copied into the UI
+        # payload (formatted a second time) when VLABS_DEBUG is set.
         logger.error(error_msg, exc_info=True)
         send_progress("error", "OPERATION_COMPLETE", {"status": "FAILED"}, error_msg)
-        final_results = {"success": False, "message": error_msg, "traceback": traceback.format_exc()}
-        # Print the final error object as a single line to stdout for the backend.
-        print(json.dumps(final_results))
-        sys.exit(1) # Exit with a non-zero code to indicate failure.
+        final_results["success"] = False
+        final_results["message"] = error_msg
+        if os.environ.get("VLABS_DEBUG"):
+            import traceback
+            final_results["traceback"] = traceback.format_exc()
+        is_overall_success = False
 
     # ---------------------------------------------------------------------------------------------
     # Subsection 3.5: Final Output
@@ -205,8 +286,9 @@ async def main():
     # --- ### STANDARDIZATION FIX ### ---
     # The final result object is printed as a single, compact JSON line to stdout.
     # This allows the Node.js backend to reliably parse it as the definitive result.
-    print(json.dumps(final_results))
-    sys.exit(0 if is_overall_success else 1)
+    # Both the success and failure paths end here, so the result is written exactly once.
+    emit_json_line(final_results)
+    sys.exit(0 if is_overall_success else 1) # Non-zero exit code indicates failure.
 
 
 # =================================================================================================
@@ -8,6 +8,12 @@ from datetime import datetime
 from enum import Enum
 from typing import Dict, Any, Optional
 
+# orjson is optional; progress events fall back to the stdlib encoder without it.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class NotificationLevel(Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -21,13 +27,14 @@ class ProgressTracker:
     def __init__(self):
         self.steps = []
         self.current_step_index = -1
+        # Monotonic perf_counter() readings, used only to compute durations.
         self.start_time = None
         self.step_start_time = None
         self.current_operation = None
         self.operation_name = None
         
     def start_operation(self, operation_name: str):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         self.operation_name = operation_name
         self.current_operation = operation_name
         self._notify(
@@ -40,7 +47,7 @@ class ProgressTracker:
     def start_step(self, step_name: str, description: str = ""):
         """Starts a new step in the operation."""
         self.current_step_index += 1
-        self.step_start_time = time.time()
+        self.step_start_time = time.perf_counter()
         step_info = {
             "step": self.current_step_index + 1,
             "name": step_name,
@@ -76,7 +83,7 @@ class ProgressTracker:
         if self.current_step_index < 0: return
         current = self.steps[self.current_step_index]
         current["status"] = status
-        current["duration"] = time.time() - self.step_start_time
+        current["duration"] = time.perf_counter() - self.step_start_time
         current["end_time"] = datetime.now().isoformat()
         if details:
             current["details"].update(details)
@@ -97,7 +104,7 @@ class ProgressTracker:
         """Completes the entire operation."""
         if not self.current_operation: return
         
-        total_duration = time.time() - self.start_time if self.start_time else 0
+        total_duration = time.perf_counter() - self.start_time if self.start_time else 0
         level = NotificationLevel.SUCCESS if status == "SUCCESS" else NotificationLevel.ERROR
         self._notify(
             level=level,
@@ -112,14 +119,21 @@ class ProgressTracker:
         self.current_operation = None
 
     def _notify(self, level: NotificationLevel, message: str, event_type: str, data: Dict[Any, Any] = None):
+        # orjson formats datetime objects natively, byte-for-byte like isoformat(), so the
+        # string is only built in Python on the stdlib fallback path.
+        now = datetime.now()
         notification_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now if orjson is not None else now.isoformat(),
             "level": level.value,
             "message": message,
             "event_type": event_type,
             "data": data or {}
         }
-        print(f"JSON_PROGRESS: {json.dumps(notification_data)}", file=sys.stderr, flush=True)
+        if orjson is not None:
+            sys.stderr.buffer.write(b"JSON_PROGRESS: " + orjson.dumps(notification_data, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+            sys.stderr.buffer.flush()
+        else:
+            print(f"JSON_PROGRESS: {json.dumps(notification_data)}", file=sys.stderr, flush=True)
 
     def get_summary(self):
         return {"operation": self.operation_name, "steps": self.steps}
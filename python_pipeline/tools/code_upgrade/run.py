@@ -109,6 +109,7 @@ DEFAULT_DEVICE_TIMEOUT = 1800  # 30 minutes per device
 DEFAULT_REBOOT_TIMEOUT = 900   # 15 minutes for reboot
 DEFAULT_CONNECTION_TIMEOUT = 30
 DEFAULT_RETRY_ATTEMPTS = 3
+IMAGE_FILE_SUFFIXES = ('.tgz', '.tar.gz', '.pkg', '.tar')  # Tuple form lets str.endswith test all at once
 
 # ================================================================================
 # SECTION 3: CUSTOM EXCEPTION HIERARCHY
@@ -410,7 +411,7 @@ def validate_image_availability(dev: Device, image_filename: str, hostname: str,
                     })
 
                     # Identify software images
-                    if any(filename.lower().endswith(ext) for ext in ['.tgz', '.tar.gz', '.pkg', '.tar']):
+                    if filename.lower().endswith(IMAGE_FILE_SUFFIXES):
                         image_files.append(filename)
 
         validation_result["available_images"] = image_files
@@ -1472,7 +1473,7 @@ def validate_command_arguments(args) -> List[str]:
         validation_errors.append("Image filename is required")
     elif not re.match(r'^[a-zA-Z0-9\-_\.]+$', args.image_filename):
         validation_errors.append(f"Invalid image filename format: {args.image_filename}")
-    elif not any(args.image_filename.lower().endswith(ext) for ext in ['.tgz', '.tar.gz', '.pkg', '.tar']):
+    elif not args.image_filename.lower().endswith(IMAGE_FILE_SUFFIXES):
         validation_errors.append(f"Image filename must end with .tgz, .tar.gz, .pkg, or .tar: {args.image_filename}")
 
     # Validate target version
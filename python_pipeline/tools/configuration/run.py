@@ -40,6 +40,7 @@ import os
 import logging
 import time
 import socket
+import hashlib
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any
@@ -53,6 +54,13 @@ except ImportError as e:
     print(json.dumps({"success": False, "error": f"Missing critical PyEZ dependency: {e}"}))
     sys.exit(1)
 
+# orjson is an optional C-accelerated encoder for progress events and the final result; stdlib json
+# is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Local utility imports.
 try:
     from utils.connect_to_hosts import connect_to_hosts, disconnect_from_hosts
@@ -73,15 +81,15 @@ class ProgressTracker:
     """A class to manage and broadcast the progress of a multi-step operation."""
     def __init__(self):
         self.steps = []; self.current_step_index = -1
-        self.start_time = None; self.step_start_time = None
+        self.start_time = None; self.step_start_time = None  # perf_counter() readings, for durations only
 
     def start_operation(self, operation_name: str):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         self.operation_name = operation_name
         self._notify(level=NotificationLevel.INFO, message=f"Starting: {operation_name}", event_type="OPERATION_START", data={"operation": operation_name, "total_steps": 9})
 
     def start_step(self, step_name: str, description: str = ""):
-        self.current_step_index += 1; self.step_start_time = time.time()
+        self.current_step_index += 1; self.step_start_time = time.perf_counter()
         step_info = {"step": self.current_step_index + 1, "name": step_name, "description": description, "status": "IN_PROGRESS", "start_time": datetime.now().isoformat(), "details": {}}
         self.steps.append(step_info)
         self._notify(level=NotificationLevel.INFO, message=f"Step {step_info['step']}: {step_name}", event_type="STEP_START", data=step_info)
@@ -89,14 +97,14 @@ class ProgressTracker:
     def complete_step(self, status: str = "COMPLETED", details: Optional[Dict] = None):
         if self.current_step_index < 0: return
         current = self.steps[self.current_step_index]
-        current["status"] = status; current["duration"] = time.time() - self.step_start_time
+        current["status"] = status; current["duration"] = time.perf_counter() - self.step_start_time
         current["end_time"] = datetime.now().isoformat()
         if details: current["details"].update(details)
         level = NotificationLevel.SUCCESS if status == "COMPLETED" else NotificationLevel.ERROR
         self._notify(level=level, message=f"Step {current['step']} {status.lower()}: {current['name']} ({current['duration']:.2f}s)", event_type="STEP_COMPLETE", data=current)
 
     def complete_operation(self, status: str = "SUCCESS"):
-        total_duration = time.time() - self.start_time if self.start_time else 0
+        total_duration = time.perf_counter() - self.start_time if self.start_time else 0
         level = NotificationLevel.SUCCESS if status == "SUCCESS" else NotificationLevel.ERROR
         self._notify(level=level, message=f"Operation completed in {total_duration:.2f}s with status: {status}", event_type="OPERATION_COMPLETE", data={"operation": getattr(self, 'operation_name', 'Unknown'), "status": status})
 
@@ -105,7 +113,11 @@ class ProgressTracker:
         notification_data = {"timestamp": datetime.now().isoformat(), "level": level.value, "message": message, "event_type": event_type, "data": data or {}}
         # By directing this to `sys.stdout`, we adhere to the new data contract where all
         # UI-facing information is sent over a single, predictable channel.
-        print(json.dumps(notification_data), file=sys.stdout, flush=True)
+        if orjson is not None:
+            sys.stdout.buffer.write(orjson.dumps(notification_data, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+            sys.stdout.buffer.flush()
+        else:
+            print(json.dumps(notification_data), file=sys.stdout, flush=True)
 
     def get_summary(self):
         return {"operation": getattr(self, 'operation_name', 'Unknown'), "total_steps": len(self.steps), "steps": self.steps}
@@ -135,6 +147,21 @@ def parse_commit_check_results(commit_check_output) -> Dict[str, Any]:
             result["errors"].append(line.strip()); result["has_errors"] = True
     return result
 
+# Diffs larger than this (UTF-8 encoded) are cut to a short head in the final JSON result.
+MAX_INLINE_DIFF_BYTES = 64 * 1024
+DIFF_HEAD_CHARS = 4096
+
+def summarize_diff(diff: str):
+    """
+    Returns the diff text to embed in the result and, for oversized diffs, a size/hash summary.
+
+    `diff` is always a string; the summary is None unless the diff was cut to its head.
+    """
+    encoded = diff.encode("utf-8", errors="surrogatepass")
+    if len(encoded) <= MAX_INLINE_DIFF_BYTES:
+        return diff, None
+    return diff[:DIFF_HEAD_CHARS], {"truncated": True, "bytes": len(encoded), "sha256": hashlib.sha256(encoded).hexdigest(), "head_chars": DIFF_HEAD_CHARS}
+
 def test_basic_reachability(host: str, port: int = 22, timeout: int = 10) -> bool:
     """Tests basic TCP connectivity to the host on the specified port."""
     try:
@@ -226,7 +253,10 @@ def main():
                 progress.complete_operation("SUCCESS")
                 return # Exit early, printing the final result in the `finally` block.
             progress.complete_step("COMPLETED", {"changes_detected": True})
-            results['details']['diff'] = diff
+            # A greenfield config can produce hundreds of KB of diff; keep the result payload small.
+            results['details']['diff'], diff_summary = summarize_diff(diff)
+            if diff_summary:
+                results['details']['diff_summary'] = diff_summary
 
             # STEP 6: Validate Configuration Syntax
             progress.start_step("CONFIG_VALIDATION", "Validating configuration syntax")
@@ -255,7 +285,8 @@ def main():
         # Subsection 4.3: Graceful Error Handling
         # ---------------------------------------------------------------------------------------------
         error_msg = f"{e.__class__.__name__}: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+        # Expected device/config failures: the message is enough, skip the traceback formatting.
+        logger.error(error_msg)
         # Ensure the current step and the overall operation are marked as FAILED in the UI.
         if progress.steps and progress.steps[-1]["status"] == "IN_PROGRESS":
             progress.complete_step("FAILED", {"error": error_msg})
@@ -286,7 +317,11 @@ def main():
         # --- ### STANDARDIZATION FIX ### ---
         # The final result is printed as a single, compact JSON line to stdout.
         # This allows the Node.js backend to reliably parse it as the definitive result.
-        print(json.dumps(results))
+        if orjson is not None:
+            sys.stdout.buffer.write(orjson.dumps(results, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+            sys.stdout.buffer.flush()
+        else:
+            print(json.dumps(results))
 
 
 # =================================================================================================
@@ -4,6 +4,12 @@ from typing import Dict, List, Optional
 import logging
 from jnpr.junos import Device
 
+# libyaml's C loader parses several times faster; PyYAML only ships it when built against libyaml.
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
 #V1
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,7 +18,7 @@ def load_yaml_file(file_path: str) -> Optional[Dict]:
     """Load a YAML file and return its contents as a Python dict or list."""
     try:
         with open(file_path, 'r') as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=YamlSafeLoader)
     except FileNotFoundError:
         logger.error(f"File not found at {file_path}")
         return None
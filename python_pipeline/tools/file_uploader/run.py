@@ -59,6 +59,7 @@
 # All necessary standard library and third-party modules are imported here.
 # =================================================================================================
 import os
+import stat
 import sys
 import logging
 import argparse
@@ -168,14 +169,13 @@ class JuniperDeviceManager:
             logger.error(f"Failed to connect: {e}", exc_info=True)
             return False, f"Failed to connect: {str(e)}"
     # ==============================PRE CHECKS======================================================
-    def perform_pre_flight_checks(self, local_file_path: str, remote_dest_path: str) -> Tuple[bool, str]:
+    def perform_pre_flight_checks(self, file_size_bytes: int, remote_dest_path: str) -> Tuple[bool, str]:
         """
         Performs checks on the remote device using a robust filesystem matching algorithm.
         """
         logger.info("Performing pre-flight checks on remote device...")
         try:
             # 1. Get the required file size, including a safety margin.
-            file_size_bytes = os.path.getsize(local_file_path)
             required_space_bytes = int(file_size_bytes * SPACE_CHECK_SAFETY_MARGIN)
 
             # 2. Get the system storage information from the device.
@@ -316,8 +316,14 @@ def cli_upload(args: argparse.Namespace):
         if not all([args.hostname, args.username, args.password, args.file, args.remote_filename]):
             raise ValueError("Missing required arguments: hostname, username, password, file, and remote_filename are required.")
         local_file_path = args.file
-        if not os.path.exists(local_file_path):
+        # A single stat() answers existence, file type and size; the size is reused by the
+        # pre-flight space check instead of being looked up again.
+        try:
+            local_file_stat = os.stat(local_file_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Source file not found at path: {local_file_path}")
+        if not stat.S_ISREG(local_file_stat.st_mode):
+            raise ValueError(f"Source path is not a regular file: {local_file_path}")
         is_valid, msg = validate_file(args.remote_filename)
         if not is_valid:
             raise ValueError(f"File validation failed: {msg}")
@@ -339,7 +345,7 @@ def cli_upload(args: argparse.Namespace):
         # STEP 3: PRE-FLIGHT CHECKS
         # -----------------------------------------------------------------------------------------
         send_event("STEP_START", "Performing pre-flight checks (e.g., disk space)...", run_id=args.run_id)
-        success, message = device_manager.perform_pre_flight_checks(local_file_path, full_remote_path)
+        success, message = device_manager.perform_pre_flight_checks(local_file_stat.st_size, full_remote_path)
         if not success:
             raise ValueError(message)
         send_event("STEP_COMPLETE", "Pre-flight checks passed.", run_id=args.run_id)
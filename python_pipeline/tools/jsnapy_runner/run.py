@@ -54,9 +54,9 @@ import argparse
 import sys
 import json
 import asyncio
+import time
 from pathlib import Path
-from datetime import datetime
-import traceback
+from datetime import datetime, timezone
 
 
 # ====================================================================================
@@ -107,7 +107,8 @@ def run_single_test(device, test_definition):
 async def run_tests_on_host(hostname, username, password, tests_to_run, host_index):
     """
     An asynchronous worker that connects to a single host, runs a list of tests,
-    and sends real-time progress updates throughout the process.
+    and sends real-time progress updates throughout the process. The blocking PyEZ
+    calls run in worker threads so that hosts gathered together actually overlap.
     """
     from jnpr.junos import Device
     from jnpr.junos.exception import ConnectTimeoutError, ConnectAuthError
@@ -116,22 +117,33 @@ async def run_tests_on_host(hostname, username, password, tests_to_run, host_ind
     execution_step = host_index * 2
 
     send_progress("STEP_START", {"step": connection_step, "name": f"Connect to {hostname}", "status": "IN_PROGRESS"}, f"Connecting to {hostname}...")
+    # perf_counter is monotonic, so the measured duration is immune to wall-clock adjustments.
+    connect_start = time.perf_counter()
+    dev = None
     try:
-        with Device(host=hostname, user=username, passwd=password, timeout=20) as dev:
-            send_progress("STEP_COMPLETE", {"step": connection_step, "duration": dev.timeout, "status": "COMPLETED"}, f"Successfully connected to {hostname}.")
-            send_progress("STEP_START", {"step": execution_step, "name": f"Run Tests on {hostname}", "status": "IN_PROGRESS"}, f"Executing {len(tests_to_run)} tests on {hostname}...")
-
-            host_results = []
-            for test_name, test_def in tests_to_run.items():
-                try:
-                    test_result = run_single_test(dev, test_def)
-                    host_results.append(test_result)
-                except Exception as e:
-                    print(f"\n[ERROR] Test '{test_name}' failed on {hostname}: {e}\n", file=sys.stderr, flush=True)
-                    host_results.append({"title": test_def.get('title', test_name), "error": str(e), "headers": [], "data": []})
-
-            send_progress("STEP_COMPLETE", {"step": execution_step, "status": "COMPLETED"}, f"Finished all tests on {hostname}.")
-            return {"hostname": hostname, "status": "success", "test_results": host_results}
+        dev = Device(host=hostname, user=username, passwd=password, timeout=20)
+        await asyncio.to_thread(dev.open)
+        connect_duration = round(time.perf_counter() - connect_start, 2)
+        send_progress("STEP_COMPLETE", {"step": connection_step, "duration": connect_duration, "status": "COMPLETED"}, f"Successfully connected to {hostname}.")
+        send_progress("STEP_START", {"step": execution_step, "name": f"Run Tests on {hostname}", "status": "IN_PROGRESS"}, f"Executing {len(tests_to_run)} tests on {hostname}...")
+
+        host_results = []
+        # Failed-test diagnostics are collected and written to stderr in one go once the
+        # loop finishes, rather than taking the stream lock and flushing per failure.
+        error_lines = []
+        for test_name, test_def in tests_to_run.items():
+            try:
+                test_result = await asyncio.to_thread(run_single_test, dev, test_def)
+                host_results.append(test_result)
+            except Exception as e:
+                error_lines.append(f"\n[ERROR] Test '{test_name}' failed on {hostname}: {e}\n\n")
+                host_results.append({"title": test_def.get('title', test_name), "error": str(e), "headers": [], "data": []})
+        if error_lines:
+            sys.stderr.write("".join(error_lines))
+            sys.stderr.flush()
+
+        send_progress("STEP_COMPLETE", {"step": execution_step, "status": "COMPLETED"}, f"Finished all tests on {hostname}.")
+        return {"hostname": hostname, "status": "success", "test_results": host_results}
 
     except (ConnectTimeoutError, ConnectAuthError, Exception) as e:
         error_message = f"An error occurred with host {hostname}: {e}"
@@ -141,6 +153,10 @@ async def run_tests_on_host(hostname, username, password, tests_to_run, host_ind
         print(f"[ERROR] {error_message}", file=sys.stderr, flush=True)
         return {"hostname": hostname, "status": "error", "message": error_message}
 
+    finally:
+        if dev is not None and dev.connected:
+            await asyncio.to_thread(dev.close)
+
 
 # ====================================================================================
 # SECTION 4: REPORT FORMATTING
@@ -152,7 +168,7 @@ def format_results_to_text(final_results):
     """
     from tabulate import tabulate
     report_parts = []
-    generation_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
+    generation_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
     report_parts.append("==================================================\n           JSNAPy Test Results Report\n==================================================")
     report_parts.append(f"Generated on: {generation_time}\n")
 
@@ -249,7 +265,7 @@ async def main_async(args):
             pipeline_root_in_container = script_dir.parent.parent
             output_dir = pipeline_root_in_container / args.save_path
             output_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
             hostname_part = hostnames[0] if len(hostnames) == 1 else 'multiple-hosts'
             filename = f"jsnapy_report_{hostname_part}_{timestamp}.txt"
             filepath = output_dir / filename
@@ -295,6 +311,8 @@ def main():
         send_progress("OPERATION_COMPLETE", {"status": "FAILED"}, error_message)
         error_output = {"type": "error", "message": error_message}
         print(json.dumps(error_output))
+        # Imported lazily: only this failure path formats a traceback.
+        import traceback
         print(f"CRITICAL ERROR: {traceback.format_exc()}", file=sys.stderr, flush=True)
         # Exit with a non-zero code to indicate failure, but after sending the clean JSON error.
         sys.exit(1)